@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 
 """
-usage: check.py [-h] [-v] path [path ...]
+usage: check.py [-h] [-v] [-j JOBS] path [path ...]
 
 Checks ELI sourcen for validity and common errors
 
@@ -20,44 +20,41 @@ find sources -name \*.geojson | xargs python scripts/check.py -vv
 
 import json
 import io
-from argparse import ArgumentParser
+import logging
+import re
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from argparse import ArgumentParser, ArgumentTypeError
+from urllib.parse import urldefrag
 from jsonschema import validate, ValidationError, RefResolver, Draft4Validator
 import spdx_lookup
 import colorlog
 
+## Replacement tokens such as {zoom} or {bbox} in a source url
+url_token = re.compile(r'{[^{}]*}')
+
 def dict_raise_on_duplicates(ordered_pairs):
     """Reject duplicate keys."""
-    d = {}
-    for k, v in ordered_pairs:
-        if k in d:
-            raise ValidationError("duplicate key: %r" % (k,))
-        else:
-            d[k] = v
+    d = dict(ordered_pairs)
+    ## Only walk the pairs to name the culprit when dict() dropped some
+    if len(d) != len(ordered_pairs):
+        seen = set()
+        for k, v in ordered_pairs:
+            if k in seen:
+                raise ValidationError("duplicate key: %r" % (k,))
+            seen.add(k)
     return d
 
-parser = ArgumentParser(description='Checks ELI sourcen for validity and common errors')
-parser.add_argument('path', nargs='+', help='Path of files to check.')
-parser.add_argument("-v", "--verbose", dest="verbose_count",
-                    action="count", default=0,
-                    help="increases log verbosity for each occurence.")
-arguments = parser.parse_args()
-logger = colorlog.getLogger()
-# Start off at Error, reduce by one level for each -v argument
-logger.setLevel(max(4 - arguments.verbose_count, 0) * 10)
-handler = colorlog.StreamHandler()
-handler.setFormatter(colorlog.ColoredFormatter())
-logger.addHandler(handler)
-
-schema = json.load(io.open('schema.json', encoding='utf-8'))
-seen_ids = set()
-
-resolver = RefResolver('', None)
-validator = Draft4Validator(schema, resolver=resolver)
-
-borkenbuild = False
-spacesave = 0
-
-for filename in arguments.path:
+def check_source(filename):
+    """Check a single source file.
+
+    Runs in a worker process, so nothing is logged here. Returns a tuple
+    (sourceid, iconsize, messages) where messages is a list of
+    (level, message) tuples for the caller to log in order.
+    """
+    messages = []
+    sourceid = None
+    iconsize = 0
     try:
 
         ## dict_raise_on_duplicates raises error on duplicate keys in geojson
@@ -66,32 +63,35 @@ for filename in arguments.path:
         ## jsonschema validate
         validator.validate(source, schema)
         sourceid = source['properties']['id']
-        if sourceid in seen_ids:
-            raise ValidationError('Id %s used multiple times' % sourceid)
-        seen_ids.add(sourceid)
+
+        ## Collect the url tokens once, {-y} stands in for {y}
+        url_tokens = set(url_token.findall(source['properties']['url']))
+        if '{-y}' in url_tokens:
+            url_tokens.add('{y}')
 
         ## {z} instead of {zoom}
-        if '{z}' in source['properties']['url']:
+        if '{z}' in url_tokens:
             raise ValidationError('{z} found instead of {zoom} in tile url')
         if 'license' in source['properties']:
             license = source['properties']['license']
             if not spdx_lookup.by_id(license) and license != 'COMMERCIAL':
                 raise ValidationError('Unknown license %s' % license)
         else:
-            logger.debug("{} has no license property".format(filename))
+            messages.append((logging.DEBUG, "{} has no license property".format(filename)))
 
         ## Check for license url. Too many missing to mark as required in schema.
         if 'license_url' not in source['properties']:
-            logger.debug("{} has no license_url".format(filename))
+            messages.append((logging.DEBUG, "{} has no license_url".format(filename)))
         if 'attribution' not in source['properties']:
-            logger.debug("{} has no attribution".format(filename))
+            messages.append((logging.DEBUG, "{} has no attribution".format(filename)))
 
         ## Check for big fat embedded icons
         if 'icon' in source['properties']:
             if source['properties']['icon'].startswith("data:"):
-                iconsize = len(source['properties']['icon'].encode('utf-8'))
-                spacesave += iconsize
-                logger.debug("{} icon should be disembedded to save {} KB".format(filename, round(iconsize/1024.0, 2)))
+                ## Base64 data urls are ASCII, so the length is the size in bytes
+                icon = source['properties']['icon']
+                iconsize = len(icon) if icon.isascii() else len(icon.encode('utf-8'))
+                messages.append((logging.DEBUG, "{} icon should be disembedded to save {} KB".format(filename, round(iconsize/1024.0, 2))))
 
         ## Validate that url has the tokens we expect
         params = []
@@ -104,7 +104,7 @@ for filename in arguments.path:
                 ValidationError("Senseless available_projections parameter in {}".format(filename))
             if 'min_zoom' in source['properties']:
                 if source['properties']['min_zoom'] == 0:
-                    logger.warning("Useless min_zoom parameter in {}".format(filename))
+                    messages.append((logging.WARNING, "Useless min_zoom parameter in {}".format(filename)))
             params = ["{zoom}", "{x}", "{y}"]
 
         ### wms: {proj}, {bbox}, {width}, {height}
@@ -117,7 +117,7 @@ for filename in arguments.path:
                 ValidationError("Missing available_projections parameter in {}".format(filename))
             params = ["{proj}", "{bbox}", "{width}", "{height}"]
 
-        missingparams = [x for x in params if x not in source['properties']['url'].replace("{-y}", "{y}")]
+        missingparams = [x for x in params if x not in url_tokens]
         if missingparams:
             raise ValidationError("Missing parameter in {}: {}".format(filename, missingparams))
 
@@ -136,10 +136,90 @@ for filename in arguments.path:
             elif source['geometry'] != None:
                 ValidationError("{} should have null geometry but it is {}".format(filename, source['geometry']))
     except ValidationError as e:
-        borkenbuild = True
-        logger.exception("Error in {} : {}".format(filename, e))
-if spacesave > 0:
-    logger.warning("Disembedding all icons would save {} KB".format(round(spacesave/1024.0, 2)))
-if borkenbuild:
-    raise SystemExit(1)
-
+        messages.append((logging.ERROR, "Error in {} : {}\n{}".format(filename, e, traceback.format_exc().rstrip())))
+    return sourceid, iconsize, messages
+
+def remote_refs(node):
+    """Yield the urls of remote documents referenced by $ref in a schema."""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == '$ref' and not value.startswith('#'):
+                yield urldefrag(value)[0]
+            else:
+                for url in remote_refs(value):
+                    yield url
+    elif isinstance(node, list):
+        for value in node:
+            for url in remote_refs(value):
+                yield url
+
+def init_worker(schema_path, store):
+    """Build the schema validator once per worker process.
+
+    store maps remote $ref urls to documents already fetched by the main
+    process, so workers don't each download them again.
+    """
+    global schema, validator
+    schema = json.load(io.open(schema_path, encoding='utf-8'))
+    resolver = RefResolver('', None, store=store)
+    validator = Draft4Validator(schema, resolver=resolver)
+
+schema_path = 'schema.json'
+schema = None
+validator = None
+
+def positive_int(value):
+    """argparse type for a count that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError("must be at least 1, got {}".format(value))
+    return number
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Checks ELI sourcen for validity and common errors')
+    parser.add_argument('path', nargs='+', help='Path of files to check.')
+    parser.add_argument("-v", "--verbose", dest="verbose_count",
+                        action="count", default=0,
+                        help="increases log verbosity for each occurence.")
+    parser.add_argument("-j", "--jobs", dest="jobs", type=positive_int, default=None,
+                        help="number of worker processes (default: number of CPUs).")
+    arguments = parser.parse_args()
+    logger = colorlog.getLogger()
+    # Start off at Error, reduce by one level for each -v argument
+    logger.setLevel(max(4 - arguments.verbose_count, 0) * 10)
+    handler = colorlog.StreamHandler()
+    handler.setFormatter(colorlog.ColoredFormatter())
+    logger.addHandler(handler)
+
+    seen_ids = set()
+    borkenbuild = False
+    spacesave = 0
+
+    ## Fetch remote $refs of the schema once here instead of in every worker
+    init_worker(schema_path, {})
+    store = {}
+    for url in set(remote_refs(schema)):
+        store[url] = validator.resolver.resolve_from_url(url)
+
+    ## Files are independent of each other, so check them in parallel. map()
+    ## keeps the results in argument order, so the log stays in file order.
+    ## Duplicate ids are only found here, after all of a file's own checks
+    ## have run, and are reported as an extra error for that file.
+    with ProcessPoolExecutor(max_workers=arguments.jobs, initializer=init_worker,
+                             initargs=(schema_path, store)) as executor:
+        results = executor.map(check_source, arguments.path, chunksize=16)
+        for filename, (sourceid, iconsize, messages) in zip(arguments.path, results):
+            if sourceid is not None:
+                if sourceid in seen_ids:
+                    messages.append((logging.ERROR, "Error in {} : Id {} used multiple times".format(filename, sourceid)))
+                seen_ids.add(sourceid)
+            spacesave += iconsize
+            for level, msg in messages:
+                if level >= logging.ERROR:
+                    borkenbuild = True
+                logger.log(level, msg)
+
+    if spacesave > 0:
+        logger.warning("Disembedding all icons would save {} KB".format(round(spacesave/1024.0, 2)))
+    if borkenbuild:
+        raise SystemExit(1)
@@ -17,14 +17,15 @@ def convert_json_source(args, source):
             max_lat = -90
             for ring in polygon_coords:
                 for coord in ring:
-                    if coord[0] < min_lon:
-                        min_lon = coord[0]
-                    if coord[0] > max_lon:
-                        max_lon = coord[0]
-                    if coord[1] < min_lat:
-                        min_lat = coord[1]
-                    if coord[1] > max_lat:
-                        max_lat = coord[1]
+                    lon, lat = coord[0], coord[1]
+                    if lon < min_lon:
+                        min_lon = lon
+                    if lon > max_lon:
+                        max_lon = lon
+                    if lat < min_lat:
+                        min_lat = lat
+                    if lat > max_lat:
+                        max_lat = lat
             bbox_obj = {}
             bbox_obj['min_lon'] = min_lon
             bbox_obj['max_lon'] = max_lon
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 import json, sys, string, util, os
-from xml.dom.minidom import parse
+import xml.etree.ElementTree as ET
 from collections import OrderedDict
 
 if len(sys.argv) != 3:
@@ -9,9 +9,9 @@ if len(sys.argv) != 3:
     print("Hint: the latest JOSM imagery XML file is at https://josm.openstreetmap.de/maps")
     exit(1)
 
-dom = parse(sys.argv[1])
+root = util.strip_namespaces(ET.parse(sys.argv[1]).getroot())
 
-imageries = dom.getElementsByTagName('entry')
+imageries = root.iter('entry')
 
 def strfn(filename):
     valid_chars = "-_()%s%s" % (string.ascii_letters, string.digits)
@@ -24,29 +24,29 @@ for imagery in imageries:
     entry['type'] = 'Feature'
 
     properties = entry['properties'] = OrderedDict()
-    properties['id'] = imagery.getElementsByTagName('id')[0].childNodes[0].nodeValue
-    properties['name'] = imagery.getElementsByTagName('name')[0].childNodes[0].nodeValue
-    properties['type'] = imagery.getElementsByTagName('type')[0].childNodes[0].nodeValue
-    properties['url']  = imagery.getElementsByTagName('url')[0].childNodes[0].nodeValue
-
-    date_node = imagery.getElementsByTagName('date')
-    if date_node:
-        date_values = date_node[0].childNodes[0].nodeValue.split(';')
+    properties['id'] = imagery.find('.//id').text
+    properties['name'] = imagery.find('.//name').text
+    properties['type'] = imagery.find('.//type').text
+    properties['url']  = imagery.find('.//url').text
+
+    date_node = imagery.find('.//date')
+    if date_node is not None:
+        date_values = date_node.text.split(';')
         properties['start_date'] = date_values[0]
         if len(date_values) == 1:
             properties['end_date'] = date_values[0]
         elif len(date_values) == 2 and date_values[1] != '-':
             properties['end_date'] = date_values[1]
 
-    if imagery.getAttribute('overlay') == "true":
+    if imagery.get('overlay') == "true":
         properties['overlay'] = True
 
-    if imagery.getAttribute('eli-best') == "true":
+    if imagery.get('eli-best') == "true":
         properties['best'] = True
 
-    country_code_node = imagery.getElementsByTagName('country-code')
-    if country_code_node:
-        properties['country_code'] = country_code_node[0].childNodes[0].nodeValue
+    country_code_node = imagery.find('.//country-code')
+    if country_code_node is not None:
+        properties['country_code'] = country_code_node.text
 
     projs = util.getprojs(imagery)
     if projs: properties['available_projections'] = projs
@@ -55,14 +55,14 @@ for imagery in imageries:
     attr_required = None
     attr_url = None
 
-    attr_text_node = imagery.getElementsByTagName('attribution-text')
-    if attr_text_node:
-        attr_text = attr_text_node[0].childNodes[0].nodeValue
-        attr_required = bool(attr_text_node[0].getAttribute('mandatory'))
+    attr_text_node = imagery.find('.//attribution-text')
+    if attr_text_node is not None:
+        attr_text = attr_text_node.text
+        attr_required = bool(attr_text_node.get('mandatory'))
 
-    attr_url_node = imagery.getElementsByTagName('attribution-url')
-    if attr_url_node:
-        attr_url = attr_url_node[0].childNodes[0].nodeValue
+    attr_url_node = imagery.find('.//attribution-url')
+    if attr_url_node is not None:
+        attr_url = attr_url_node.text
 
     if any((attr_text, attr_required, attr_url)):
         attribution_dict = dict()
@@ -76,37 +76,37 @@ for imagery in imageries:
 
     default = None
 
-    is_default_node = imagery.getElementsByTagName('default')
-    if is_default_node:
-        default = bool(is_default_node[0].childNodes[0].nodeValue)
+    is_default_node = imagery.find('.//default')
+    if is_default_node is not None:
+        default = bool(is_default_node.text)
 
     if default is not None:
         properties['default'] = default
 
     icon = None
 
-    icon_node = imagery.getElementsByTagName('icon')
-    if icon_node:
-        icon = icon_node[0].childNodes[0].nodeValue
+    icon_node = imagery.find('.//icon')
+    if icon_node is not None:
+        icon = icon_node.text
 
-    if icon_node:
+    if icon_node is not None:
         properties['icon'] = icon
 
-    max_zoom_node = imagery.getElementsByTagName('max-zoom')
-    if max_zoom_node:
-        properties['max_zoom'] = int(max_zoom_node[0].childNodes[0].nodeValue)
+    max_zoom_node = imagery.find('.//max-zoom')
+    if max_zoom_node is not None:
+        properties['max_zoom'] = int(max_zoom_node.text)
 
-    min_zoom_node = imagery.getElementsByTagName('min-zoom')
-    if min_zoom_node:
-        properties['min_zoom'] = int(min_zoom_node[0].childNodes[0].nodeValue)
+    min_zoom_node = imagery.find('.//min-zoom')
+    if min_zoom_node is not None:
+        properties['min_zoom'] = int(min_zoom_node.text)
 
-    permission_ref_node = imagery.getElementsByTagName('permission-ref')
-    if permission_ref_node:
-        properties['license_url'] = permission_ref_node[0].childNodes[0].nodeValue
+    permission_ref_node = imagery.find('.//permission-ref')
+    if permission_ref_node is not None:
+        properties['license_url'] = permission_ref_node.text
 
-    description_node = imagery.getElementsByTagName('description')
-    if description_node:
-        properties['description'] = description_node[0].childNodes[0].nodeValue
+    description_node = imagery.find('.//description')
+    if description_node is not None:
+        properties['description'] = description_node.text
 
     (bbox, rings) = util.getrings(imagery)
 
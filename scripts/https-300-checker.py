@@ -2,41 +2,107 @@
 
 import json
 import requests
+from requests.adapters import HTTPAdapter
 import argparse
 import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
 
 switch = re.compile('{switch:([^,]*),[^}]*}')
 verbose = False
+# (connect, read) timeouts in seconds, so one slow server can't stall a worker
+timeout = (3, 7)
+
+# Many sources share a host, so keep connections alive between checks
+session = requests.Session()
+adapter = HTTPAdapter(pool_connections=64, pool_maxsize=64)
+session.mount("http://", adapter)
+session.mount("https://", adapter)
+
+def fetch(url, need_body):
+    """HEAD is enough to follow redirects, only GET when the body is compared"""
+    if not need_body:
+        response = session.head(url, timeout=timeout, allow_redirects=True)
+        # Servers without HEAD support answer 400, 403, 404, 405 or 501 rather
+        # than just 405, so retry any error with the GET we'd have done anyway
+        if response.status_code < 400:
+            return response
+        response.close()
+    return session.get(url, timeout=timeout, stream=True)
+
+def read_blocks(response, size=4096):
+    """Yield a streamed body in blocks of exactly size bytes, bar the last"""
+    buf = b''
+    for chunk in response.iter_content(size):
+        buf += chunk
+        while len(buf) >= size:
+            yield buf[:size]
+            buf = buf[size:]
+    if buf:
+        yield buf
+
+def same_content(response, response2):
+    """Compare two streamed bodies, stopping at the first block that differs"""
+    for block, block2 in zip_longest(read_blocks(response), read_blocks(response2)):
+        if block != block2:
+            return False
+    return True
 
 def check_url(url):
+    """Check a single url, returning the lines to print for it"""
+    lines = []
     if url.startswith(("IRS", "data", "SPOT", "bing")):
         # not for me
-        return True
+        return lines
 
     url = switch.sub(r'\1', url)
     try:
-        response = requests.get(url, timeout=5)
-    except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError):
+        response = fetch(url, url.startswith("http://"))
+    except requests.exceptions.RequestException:
         if verbose:
-            print("Could not connect to " + url)
-            print("--")
-        return True
+            lines.append("Could not connect to " + url)
+            lines.append("--")
+        return lines
+    try:
+        lines.extend(check_response(url, response))
+    finally:
+        response.close()
+    return lines
+
+def check_response(url, response):
+    """Report redirects and whether an http url serves the same over https"""
+    lines = []
     if response.history and response.url != "http://imagico.de/map/empty_tile.png":
-        print("Request was redirected")
+        lines.append("Request was redirected")
         for resp in response.history:
-            print(resp.status_code, resp.url)
-        print("Final destination:")
-        print(response.status_code, response.url)
-        print("--")
+            lines.append("{} {}".format(resp.status_code, resp.url))
+        lines.append("Final destination:")
+        lines.append("{} {}".format(response.status_code, response.url))
+        lines.append("--")
     if url.startswith("http://"):
         urls = url.replace("http://","https://",1)
         try:
-            response2 = requests.get(urls, timeout=5)
-            if response.text == response2.text:
-                print("It looks like {} can be converted to https".format( url.encode('ascii')))
-                print("--")
-        except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError):
+            response2 = session.get(urls, timeout=timeout, stream=True)
+            try:
+                if same_content(response, response2):
+                    lines.append("It looks like {} can be converted to https".format( url.encode('ascii')))
+                    lines.append("--")
+            finally:
+                response2.close()
+        except requests.exceptions.RequestException:
             pass
+    return lines
+
+def feature_urls(feature):
+    """Urls of a feature to check, up to the first one that is missing"""
+    try:
+        yield feature["properties"]["url"]
+        yield feature["properties"]["icon"]
+        yield feature["properties"]["license_url"]
+        yield feature["properties"]["attribution"]["url"]
+    except KeyError:
+        return
 
 # check_url("http://github.com")
 
@@ -47,15 +113,19 @@ parser.add_argument('-v', dest='verbose', action='store_true', help="List server
 
 args = parser.parse_args()
 
-features = []
+urls = []
 for file in args.files:
     with open(file, 'r') as f:
         data = json.load(f)
         for feature in data["features"]:
-            try:
-                check_url(feature["properties"]["url"])
-                check_url(feature["properties"]["icon"])
-                check_url(feature["properties"]["license_url"])
-                check_url(feature["properties"]["attribution"]["url"])
-            except KeyError:
-                continue
+            urls.extend(feature_urls(feature))
+
+# Licence and attribution urls are shared by many sources, only check each once
+urls = list(OrderedDict.fromkeys(urls))
+
+# Checks are dominated by waiting on the network, so overlap them. Output is
+# printed in input order once each url is done.
+with ThreadPoolExecutor(max_workers=8) as executor:
+    for lines in executor.map(check_url, urls):
+        for line in lines:
+            print(line)
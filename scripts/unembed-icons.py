@@ -28,7 +28,8 @@ for filename in arguments.path:
         source = json.load(f)
         if 'icon' in source['properties']:
             if source['properties']['icon'].startswith("data:image/png"):
-                iconsize = len(source['properties']['icon'].encode('utf-8'))
+                # Base64 is ASCII, so the length is the size in bytes
+                iconsize = len(source['properties']['icon'])
                 spacesave += iconsize
                 logger.debug("{} icon will disembedded to save {} KB".format(filename, round(iconsize/1024.0, 2)))
                 if source['properties']['icon'] in knownIcons:
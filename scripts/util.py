@@ -1,34 +1,39 @@
+def strip_namespaces(root):
+    """Drop namespaces from tag names, JOSM's imagery XML uses a default one"""
+    for elem in root.iter():
+        elem.tag = elem.tag.rpartition('}')[2]
+    return root
+
 def getprojs(elem):
-    o = []
-    projs_node = elem.getElementsByTagName('projections')
-    if projs_node and projs_node[0].parentNode.tagName != 'mirror':
+    projs_node = elem.find('.//projections')
+    if projs_node is not None and projs_node not in elem.findall('.//mirror/projections'):
         o = []
-        for proj_node in projs_node[0].getElementsByTagName('code'):
-            code = proj_node.childNodes[0].nodeValue
+        for proj_node in projs_node.iter('code'):
+            code = proj_node.text
             o.append(code)
         return o
 
 def textelem(elem, y):
-    e = elem.getElementsByTagName(y)
-    if e: return e[0].childNodes[0].nodeValue
+    e = elem.find('.//' + y)
+    if e is not None: return e.text
     else: return None
 
 def getrings(elem):
-    bounds_node = elem.getElementsByTagName('bounds')
-    if bounds_node:
-        min_lat = float(bounds_node[0].getAttribute('min-lat'))
-        min_lon = float(bounds_node[0].getAttribute('min-lon'))
-        max_lat = float(bounds_node[0].getAttribute('max-lat'))
-        max_lon = float(bounds_node[0].getAttribute('max-lon'))
+    bounds_node = elem.find('.//bounds')
+    if bounds_node is not None:
+        min_lat = float(bounds_node.get('min-lat'))
+        min_lon = float(bounds_node.get('min-lon'))
+        max_lat = float(bounds_node.get('max-lat'))
+        max_lon = float(bounds_node.get('max-lon'))
         bbox = dict(min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon)
         rings = []
-        shape_nodes = bounds_node[0].getElementsByTagName('shape')
+        shape_nodes = bounds_node.iter('shape')
         for shape_node in shape_nodes:
             ring = []
-            point_nodes = shape_node.getElementsByTagName('point')
+            point_nodes = shape_node.iter('point')
             for point in point_nodes:
-                lat = float(point.getAttribute('lat'))
-                lon = float(point.getAttribute('lon'))
+                lat = float(point.get('lat'))
+                lon = float(point.get('lon'))
                 ring.append((lon, lat))
             rings.append(ring)
         return bbox, rings